@@ -1,10 +1,16 @@
+import uuid
+import orjson
 import zmq.asyncio
 from textual.app import App, ComposeResult
-from textual.widgets import Header, Footer, Input, Static, Button, DataTable
+from textual.widgets import Header, Footer, Input, RichLog, Button, DataTable
 from textual.containers import Vertical, Horizontal, ScrollableContainer
 import asyncio
 from rich.text import Text
 from .utils import TAKE_NAME
+from shared.constants import IPC_ENABLED, IPC_ENDPOINT
+
+# Troca separadores do formato en-US (1,234.56) para pt-BR (1.234,56) em uma única passada
+_BRL_SEPARATORS = str.maketrans(",.", ".,")
 
 class ChatApp(App):
     """
@@ -18,10 +24,11 @@ class ChatApp(App):
 
     Atributos:
         _shutdown_lock (asyncio.Lock): Lock para controle de desligamento seguro
-        zmq_context (zmq.asyncio.Context): Contexto ZMQ para comunicação
+        ctx (zmq.asyncio.Context): Contexto ZMQ compartilhado pelo processo
         client_socket (zmq.Socket): Socket para comunicação com o servidor
-        poller (zmq.asyncio.Poller): Poller para recebimento assíncrono de mensagens
         results_table (DataTable): Widget para exibição dos resultados de busca
+        _chat_output (RichLog): Área de mensagens do chat (cacheada no on_mount)
+        _chat_input (Input): Campo de entrada de mensagens (cacheado no on_mount)
     """
 
     CSS = """
@@ -69,17 +76,15 @@ class ChatApp(App):
         background: $primary;
         color: $text;
     }
-    .assistant-message {
-        color: #4477ff;
-    }
-    .user-message {
-        color: #44ff77;
-    }
-    .error-message {
-        color: #ff4444;
-    }
     """
 
+    # Estilos Rich aplicados a cada tipo de mensagem do chat
+    MESSAGE_STYLES = {
+        "assistant": "#4477ff",
+        "user": "#44ff77",
+        "error": "#ff4444",
+    }
+
     BINDINGS = [
         ('ctrl+q', 'quit', 'Sair'),  # Atalho para sair da aplicação
     ]
@@ -92,10 +97,11 @@ class ChatApp(App):
         # Controle de desligamento seguro
         self._shutdown_lock = asyncio.Lock()
         # Configuração do ZeroMQ
-        self.zmq_context = None
-        self.ctx = zmq.asyncio.Context()
+        self.ctx = zmq.asyncio.Context.instance()  # Singleton: não deve ser terminado aqui
         self.client_socket = None
-        self.poller = zmq.asyncio.Poller()
+        # Referências aos widgets, resolvidas uma única vez no on_mount
+        self._chat_output = None
+        self._chat_input = None
         # Configuração da tabela de resultados
         self.results_table = DataTable(
             id="results_table",
@@ -122,8 +128,7 @@ class ChatApp(App):
         """
         yield Header()
         with Vertical(id="main_container"):
-            with ScrollableContainer(id="chat_output"):
-                yield Static("", id="chat_messages")
+            yield RichLog(id="chat_output", wrap=True)
             with ScrollableContainer(id="results_container"):
                 yield self.results_table
             with Horizontal(id="input_container"):
@@ -136,10 +141,15 @@ class ChatApp(App):
         Configuração inicial após montagem da interface.
 
         Tarefas:
-        1. Configura colunas da tabela de resultados
-        2. Conecta ao servidor
-        3. Inicia task para escutar mensagens
+        1. Guarda referências aos widgets usados com frequência
+        2. Configura colunas da tabela de resultados
+        3. Conecta ao servidor
+        4. Inicia task para escutar mensagens
         """
+        # Evita percorrer o DOM a cada mensagem
+        self._chat_output = self.query_one("#chat_output", RichLog)
+        self._chat_input = self.query_one("#chat_input", Input)
+
         # Configuração inicial da tabela
         self.results_table.add_columns(
             "Marca", "Modelo", "Ano", "Preço", "Cor", "Combustível", 
@@ -156,13 +166,16 @@ class ChatApp(App):
         Estabelece conexão com o servidor via ZeroMQ.
 
         Configura:
-        - Socket REQ (Request) para comunicação
-        - Poller para recebimento assíncrono
+        - Socket DEALER com identidade própria, permitindo várias requisições em voo
+        - Endpoint IPC quando habilitado (ZMQ_IPC=1); TCP caso contrário
         """
         try:
-            self.client_socket = self.ctx.socket(zmq.REQ)
-            self.client_socket.connect("tcp://127.0.0.1:5555")
-            self.poller.register(self.client_socket, zmq.POLLIN)
+            self.client_socket = self.ctx.socket(zmq.DEALER)
+            self.client_socket.setsockopt(zmq.IDENTITY, uuid.uuid4().bytes)
+            if IPC_ENABLED and zmq.has('ipc'):
+                self.client_socket.connect(IPC_ENDPOINT)
+            else:
+                self.client_socket.connect("tcp://127.0.0.1:5555")
             self.display_message("✅ Conectado ao servidor de busca de veículos", "assistant")
             self.display_message(f"\n🔹 Olá {TAKE_NAME()}, como posso te ajudar hoje?", 'assistant')
         except Exception as e:
@@ -173,7 +186,7 @@ class ChatApp(App):
         Escuta continuamente por mensagens do servidor.
 
         Processo:
-        1. Usa poller para verificar mensagens de forma assíncrona
+        1. Aguarda mensagens diretamente no socket assíncrono
         2. Processa diferentes tipos de respostas:
            - Mensagens simples
            - Mensagens com sugestões
@@ -181,17 +194,19 @@ class ChatApp(App):
         """
         while True:
             try:
-                events = await self.poller.poll(100)  # Poll com timeout de 100ms
-                if self.client_socket in dict(events):
-                    response = await self.client_socket.recv_json()
-                    
-                    message = response['message']
-                    
-                    # Adiciona sugestões se presentes
-                    if 'suggestions' in response:
-                        suggestions = "\nSugestões:\n💡 " + "\n💡 ".join(response['suggestions'])
-                        message += suggestions
-                    
+                # O recv resolve imediatamente quando já há frame pendente
+                frames = await self.client_socket.recv_multipart(copy=False)
+                response = orjson.loads(frames[-1].bytes)  # Descarta o delimitador vazio
+                
+                message = response['message']
+                
+                # Adiciona sugestões se presentes
+                if 'suggestions' in response:
+                    suggestions = "\nSugestões:\n💡 " + "\n💡 ".join(response['suggestions'])
+                    message += suggestions
+                
+                # Agrupa mensagem e tabela em uma única atualização de tela
+                with self.batch_update():
                     self.display_message(f"\n🔹 Assistente: {message}", "assistant")
                     
                     # Exibe resultados se presentes
@@ -200,11 +215,12 @@ class ChatApp(App):
                         self.results_table.display = True
                     else:
                         self.results_table.display = False
-                        
+                    
+            except zmq.ContextTerminated:
+                break  # Contexto encerrado durante o desligamento
             except Exception as e:
                 self.display_message(f"❌ Erro ao receber mensagem: {e}", "error")
                 break
-            await asyncio.sleep(0.1)  # Previne uso excessivo de CPU
 
     async def display_results(self, results):
         """
@@ -219,13 +235,15 @@ class ChatApp(App):
         """
         self.results_table.clear()
         
+        # Monta todas as linhas antes e insere em lote (uma única invalidação de layout)
+        rows = []
         for car in results:
             # Formatação especial para preço (R$ 99.999,99)
-            preco = Text(f'R$ {car.get("preco"):,.2f}'.replace(',', 'X').replace('.', ',').replace('X', '.'), style="green bold")
+            preco = Text(f'R$ {car.get("preco"):,.2f}'.translate(_BRL_SEPARATORS), style="green bold")
             # Formatação para quilometragem (99.999 km)
-            km = Text(f"{car.get('quilometragem', 0):,} km", style="#888888")
+            km = Text(f"{car.get('quilometragem', 0):,} km".translate(_BRL_SEPARATORS), style="#888888")
             
-            self.results_table.add_row(
+            rows.append((
                 car.get('marca', ''),
                 car.get('modelo', ''),
                 str(car.get('ano', '')),
@@ -236,7 +254,8 @@ class ChatApp(App):
                 km,
                 f"{car.get('motor', 0)}L",
                 str(car.get('qtt_portas', ''))
-            )
+            ))
+        self.results_table.add_rows(rows)
 
     async def send_message(self, message):
         """
@@ -248,10 +267,11 @@ class ChatApp(App):
         if message and self.client_socket:
             self.display_message(f"🔸 Você: {message}", "user")
             try:
-                await self.client_socket.send_json({"message": message})
+                # Delimitador vazio mantém o envelope compatível com o ROUTER do servidor
+                await self.client_socket.send_multipart([b"", orjson.dumps({"message": message})], copy=False)
             except Exception as e:
                 self.display_message(f"❌ Erro: {e}", "error")
-            self.query_one("#chat_input", Input).value = ""  # Limpa o input
+            self._chat_input.value = ""  # Limpa o input
         elif not message:
             self.display_message("❌ Por favor, digite uma mensagem.", "error")
 
@@ -272,7 +292,7 @@ class ChatApp(App):
         Args:
             event: Evento de clique no botão
         """
-        await self.send_message(self.query_one("#chat_input", Input).value.strip())
+        await self.send_message(self._chat_input.value.strip())
 
     def display_message(self, message: str, message_type: str = "assistant"):
         """
@@ -282,14 +302,9 @@ class ChatApp(App):
             message: Texto da mensagem
             message_type: Tipo de mensagem (assistant/user/error)
         """
-        chat_messages = self.query_one("#chat_messages", Static)
-        style_class = f" {message_type}-message" if message_type else ""
-        message_html = f"[{style_class}]{message}[/]"
-        
-        # Mantém histórico e adiciona nova mensagem
-        new_content = f"{chat_messages.renderable}\n{message_html}" if chat_messages.renderable else message_html
-        chat_messages.update(new_content)
-        self.query_one("#chat_output").scroll_end()  # Auto-scroll
+        style = self.MESSAGE_STYLES.get(message_type, "")
+        # RichLog apenas acrescenta a nova linha e faz auto-scroll
+        self._chat_output.write(Text(message, style=style))
 
 if __name__ == "__main__":
     app = ChatApp()
@@ -6,6 +6,13 @@ def run_server():
     server.run()
 
 def run_client():
+    try:
+        # uvloop acelera o loop asyncio usado pelo Textual e pelo ZMQ (indisponível no Windows)
+        import asyncio
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
     from client.app import ChatApp
     app = ChatApp()
     app.run()
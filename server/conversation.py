@@ -1,12 +1,87 @@
-from .repository import CarRepository
-from typing import Dict
+from .repository import CarRepository, Filters
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple, Union
+from functools import lru_cache, partial
+import orjson
 from .message_handler import MessageHandler
-from enum import Enum, auto
+from enum import IntEnum, auto
 from shared.constants import CORES, COMBUSTIVEIS, TRANSMISSOES
 
-class ConversationState(Enum):
+# Resposta de um handler: dicionário ou JSON já serializado (respostas estáticas)
+Reply = Union[Dict, bytes]
+
+# Sugestões estáticas, construídas uma única vez no carregamento do módulo
+_PRICE_SUGGESTIONS = (
+    "Até 40.000",
+    "Entre 40.000 e 60.000",
+    "Entre 60.000 e 80.000",
+    "Acima de 80.000"
+)
+_COR_SUGGESTIONS = tuple(CORES[:5])  # Top 5 cores
+_COMB_SUGGESTIONS = tuple(COMBUSTIVEIS[:3])  # Top 3 combustíveis
+_TRANS_SUGGESTIONS = tuple(TRANSMISSOES)  # Todas as transmissões
+
+
+def _encode_reply(reply: Dict) -> bytes:
+    """
+    Serializa uma resposta no mesmo formato JSON enviado pelo servidor.
+
+    Args:
+        reply: Resposta a ser serializada
+
+    Returns:
+        bytes: Payload pronto para envio pelo socket
+    """
+    return orjson.dumps(reply)
+
+
+# Respostas totalmente estáticas, serializadas uma única vez
+_DEFAULT_REPLY = _encode_reply({'message': "Como posso te ajudar?"})
+_PRICE_RETRY_REPLY = _encode_reply({
+    'message': "Não consegui entender a faixa de preço.Poderia informar novamente? (Ex: 'até 50.000' ou 'entre 30.000 e 60.000')",
+    'suggestions': _PRICE_SUGGESTIONS
+})
+_COR_RETRY_REPLY = _encode_reply({
+    'message': "Não consegui identificar a cor. Poderia informar qual cor você prefere?",
+    'suggestions': _COR_SUGGESTIONS
+})
+_COMB_RETRY_REPLY = _encode_reply({
+    'message': "Não consegui identificar o combustível. Poderia informar qual tipo você prefere?",
+    'suggestions': _COMB_SUGGESTIONS
+})
+_TRANS_RETRY_REPLY = _encode_reply({
+    'message': "Não consegui identificar a transmissão. Poderia informar qual tipo você prefere?",
+    'suggestions': _TRANS_SUGGESTIONS
+})
+
+
+# Mensagens de marca/modelo não identificados (também usadas com sugestões por prefixo)
+_BRAND_RETRY_MESSAGE = "Não consegui identificar a marca. Poderia informar qual marca você prefere?"
+_MODEL_RETRY_MESSAGE = "Não consegui identificar o modelo. Poderia informar qual modelo você deseja?"
+
+
+@lru_cache(maxsize=64)
+def _model_retry_reply(suggestions: Tuple[str, ...]) -> bytes:
+    """
+    Resposta serializada para modelo não identificado, cacheada por conjunto de sugestões da marca.
+
+    Args:
+        suggestions: Modelos sugeridos para a marca atual
+
+    Returns:
+        bytes: Payload pronto para envio pelo socket
+    """
+    return _encode_reply({
+        'message': _MODEL_RETRY_MESSAGE,
+        'suggestions': suggestions
+    })
+
+
+class ConversationState(IntEnum):
     """
     Enumeração que representa os estados possíveis da conversa.
+
+    Baseada em int: comparações e hash de chaves da tabela de despacho são feitos em C.
     
     Estados:
         WELCOME: Estado inicial de boas-vindas
@@ -29,6 +104,48 @@ class ConversationState(Enum):
     AWAITING_TRANSMISSAO = auto()
     READY_TO_SEARCH = auto()
 
+@dataclass(frozen=True, slots=True)
+class _Stage:
+    """
+    Etapa da conversa que apenas reconhece um termo, grava-o nos filtros e avança.
+
+    Atributos:
+        extract: Extrator do MessageHandler (texto normalizado, repositório) -> valor ou None
+        field: Campo de Filters preenchido com o valor reconhecido
+        next_state: Estado seguinte da conversa
+        success_message: Mensagem de confirmação; '{}' recebe o valor reconhecido
+        suggestions: Sugestões para a próxima etapa
+        retry_reply: Resposta serializada quando nenhum valor é reconhecido
+    """
+    extract: Callable[[str, CarRepository], Optional[str]]
+    field: str
+    next_state: ConversationState
+    success_message: str
+    suggestions: Tuple[str, ...]
+    retry_reply: bytes
+
+
+# Etapas de simples reconhecimento, tratadas por ConversationManager._handle_stage
+_STAGES: Dict[ConversationState, _Stage] = {
+    ConversationState.AWAITING_COR: _Stage(
+        extract=MessageHandler.extract_color,
+        field='cor',
+        next_state=ConversationState.AWAITING_COMBUSTIVEL,
+        success_message="Boa escolha! {} é uma ótima cor. Qual tipo de combustível você prefere?",
+        suggestions=_COMB_SUGGESTIONS,
+        retry_reply=_COR_RETRY_REPLY
+    ),
+    ConversationState.AWAITING_COMBUSTIVEL: _Stage(
+        extract=MessageHandler.extract_fuel,
+        field='combustivel',
+        next_state=ConversationState.AWAITING_TRANSMISSAO,
+        success_message="Entendido! Só mais uma informação: Qual tipo de transmissão você deseja?",
+        suggestions=_TRANS_SUGGESTIONS,  # Todas as opções de transmissão
+        retry_reply=_COMB_RETRY_REPLY
+    ),
+}
+
+
 class ConversationManager:
     """
     Gerenciador de conversação para busca de veículos.
@@ -39,9 +156,19 @@ class ConversationManager:
     Atributos:
         repo (CarRepository): Repositório de dados de veículos
         state (ConversationState): Estado atual da conversação
-        filters (Dict[str, str]): Filtros acumulados para a busca
+        filters (Filters): Filtros acumulados para a busca
+        _top_brands (Tuple[str, ...]): Top 5 marcas, calculadas uma única vez
+        _top_models (Dict[str, Tuple[str, ...]]): Top 5 modelos por marca, calculados sob demanda
+        _brand_retry_reply (bytes): Resposta serializada para marca não identificada
+        _dispatch (Dict[ConversationState, Callable]): Handler de cada estado da conversa
     """
 
+    # Conjunto fixo de atributos: dispensa o __dict__ por instância
+    __slots__ = (
+        "repo", "state", "filters", "_top_brands", "_top_models", "_brand_retry_reply",
+        "_dispatch"
+    )
+
     def __init__(self, repository: CarRepository):
         """
         Inicializa o gerenciador de conversação.
@@ -51,9 +178,25 @@ class ConversationManager:
         """
         self.repo = repository
         self.state = ConversationState.INIT  # Estado inicial
-        self.filters: Dict[str, str] = {}  # Filtros acumulados
+        self.filters = Filters()  # Filtros acumulados
+        # Os dados não mudam durante a sessão: sugestões podem ser memoizadas
+        self._top_brands: Tuple[str, ...] = repository.get_unique_brands()[:5]
+        self._top_models: Dict[str, Tuple[str, ...]] = {}
+        self._brand_retry_reply = _encode_reply({
+            'message': _BRAND_RETRY_MESSAGE,
+            'suggestions': self._top_brands
+        })
+        # Tabela de despacho com métodos já vinculados: estado atual -> handler
+        self._dispatch: Dict[ConversationState, Callable[[str], Reply]] = {
+            ConversationState.INIT: lambda _text: self._handle_init(),
+            ConversationState.AWAITING_BRAND: self._handle_brand_input,
+            ConversationState.AWAITING_MODEL: self._handle_model_input,
+            ConversationState.AWAITING_PRECO: self._handle_preco_input,
+            **{state: partial(self._handle_stage, stage) for state, stage in _STAGES.items()},
+            ConversationState.AWAITING_TRANSMISSAO: self._handle_transmissao_input,
+        }
 
-    def process_message(self, message: str) -> Dict:
+    def process_message(self, message: str) -> Reply:
         """
         Processa uma mensagem do usuário e retorna uma resposta apropriada.
 
@@ -61,35 +204,39 @@ class ConversationManager:
             message: Mensagem de texto do usuário
 
         Returns:
-            Dict: Resposta contendo:
+            Reply: Resposta contendo os campos abaixo, ou os mesmos já serializados
+            em JSON (bytes) quando a resposta é estática:
                 - message: Texto de resposta
                 - suggestions: Sugestões de opções (opcional)
                 - results: Resultados da busca (opcional)
                 - complete: Flag de conclusão (opcional)
 
         Comportamento:
-            Roteia a mensagem para o handler apropriado baseado no estado atual
+            Roteia a mensagem para o handler apropriado via tabela de despacho (_dispatch)
         """
         normalized = MessageHandler.normalize_text(message)  # Normaliza o texto para comparação
         
         # Roteamento baseado no estado atual
-        if self.state == ConversationState.INIT:
-            return self._handle_init()
-        elif self.state == ConversationState.AWAITING_BRAND:
-            return self._handle_brand_input(normalized)
-        elif self.state == ConversationState.AWAITING_MODEL:
-            return self._handle_model_input(normalized)
-        elif self.state == ConversationState.AWAITING_PRECO:
-            return self._handle_preco_input(normalized)
-        elif self.state == ConversationState.AWAITING_COR:
-            return self._handle_cor_input(normalized)
-        elif self.state == ConversationState.AWAITING_COMBUSTIVEL:
-            return self._handle_combustivel_input(normalized)
-        elif self.state == ConversationState.AWAITING_TRANSMISSAO:
-            return self._handle_transmissao_input(normalized)
+        handler = self._dispatch.get(self.state)
+        if handler:
+            return handler(normalized)
         
         # Estado padrão caso não reconheça
-        return {'message': "Como posso te ajudar?"}
+        return _DEFAULT_REPLY
+
+    def _get_top_models(self, brand: str) -> Tuple[str, ...]:
+        """
+        Retorna os 5 primeiros modelos de uma marca, consultando o repositório apenas uma vez.
+
+        Args:
+            brand: Marca do veículo
+
+        Returns:
+            Tuple[str, ...]: Até 5 modelos da marca
+        """
+        if brand not in self._top_models:
+            self._top_models[brand] = self.repo.get_models_for_brand(brand)[:5]
+        return self._top_models[brand]
 
     def _handle_init(self) -> Dict:
         """
@@ -100,10 +247,10 @@ class ConversationManager:
         self.state = ConversationState.AWAITING_BRAND
         return {
             'message': "Que legal! Vou te ajudar a encontrar o carro ideal. Qual marca você prefere?",
-            'suggestions': self.repo.get_unique_brands()[:5]  # Top 5 marcas como sugestão
+            'suggestions': self._top_brands  # Top 5 marcas como sugestão
         }
 
-    def _handle_brand_input(self, text: str) -> Dict:
+    def _handle_brand_input(self, text: str) -> Reply:
         """
         Processa a entrada do usuário para marca do veículo.
 
@@ -111,32 +258,33 @@ class ConversationManager:
             text: Texto normalizado contendo possível marca
 
         Returns:
-            Dict: Resposta apropriada baseada no reconhecimento da marca
+            Reply: Resposta apropriada baseada no reconhecimento da marca
         """
         brand = MessageHandler.extract_brand(text, self.repo)
         
         # Validação da marca
         if not brand:
-            return {
-                'message': "Não consegui identificar a marca. Poderia informar qual marca você prefere?",
-                'suggestions': self.repo.get_unique_brands()[:5]
-            }
+            # Texto parcial ("fia") vira sugestões por prefixo; senão, as marcas padrão
+            suggestions = self.repo.suggest_brands(text)
+            if suggestions:
+                return {'message': _BRAND_RETRY_MESSAGE, 'suggestions': suggestions}
+            return self._brand_retry_reply
             
         if not self.repo.brand_exists(brand):
             return {
                 'message': f"Desculpe, não encontrei carros da marca {brand}. Alguma dessas marcas te interessa?",
-                'suggestions': self.repo.get_unique_brands()[:5]
+                'suggestions': self._top_brands
             }
             
         # Atualiza filtros e estado
-        self.filters['marca'] = brand
+        self.filters.marca = brand
         self.state = ConversationState.AWAITING_MODEL
         return {
             'message': f"Ótima escolha! Temos ótimos modelos da {brand}. Qual você prefere?",
-            'suggestions': self.repo.get_models_for_brand(brand)[:5]  # Top 5 modelos da marca
+            'suggestions': self._get_top_models(brand)  # Top 5 modelos da marca
         }
 
-    def _handle_model_input(self, text: str) -> Dict:
+    def _handle_model_input(self, text: str) -> Reply:
         """
         Processa a entrada do usuário para modelo do veículo.
 
@@ -144,37 +292,33 @@ class ConversationManager:
             text: Texto normalizado contendo possível modelo
 
         Returns:
-            Dict: Resposta apropriada baseada no reconhecimento do modelo
+            Reply: Resposta apropriada baseada no reconhecimento do modelo
         """
-        model = MessageHandler.extract_model(text, self.filters['marca'], self.repo)
+        model = MessageHandler.extract_model(text, self.filters.marca, self.repo)
         
         # Validação do modelo
         if not model:
-            return {
-                'message': "Não consegui identificar o modelo. Poderia informar qual modelo você deseja?",
-                'suggestions': self.repo.get_models_for_brand(self.filters['marca'])[:5]
-            }
+            # Texto parcial vira sugestões por prefixo; senão, os modelos padrão da marca
+            suggestions = self.repo.suggest_models(self.filters.marca, text)
+            if suggestions:
+                return {'message': _MODEL_RETRY_MESSAGE, 'suggestions': suggestions}
+            return _model_retry_reply(self._get_top_models(self.filters.marca))
             
-        if not self.repo.model_exists(model, self.filters['marca']):
+        if not self.repo.model_exists(model, self.filters.marca):
             return {
-                'message': f"Desculpe, não encontrei o modelo {model} para {self.filters['marca']}. Algum desses te interessa?",
-                'suggestions': self.repo.get_models_for_brand(self.filters['marca'])[:5]
+                'message': f"Desculpe, não encontrei o modelo {model} para {self.filters.marca}. Algum desses te interessa?",
+                'suggestions': self._get_top_models(self.filters.marca)
             }
             
         # Atualiza filtros e estado
-        self.filters['modelo'] = model
+        self.filters.modelo = model
         self.state = ConversationState.AWAITING_PRECO
         return {
-            'message': f"Excelente escolha! O {self.filters['marca']} {model} é um ótimo carro. Qual faixa de preço você está considerando?",
-            'suggestions': [
-                "Até 40.000",
-                "Entre 40.000 e 60.000",
-                "Entre 60.000 e 80.000",
-                "Acima de 80.000"
-            ]
+            'message': f"Excelente escolha! O {self.filters.marca} {model} é um ótimo carro. Qual faixa de preço você está considerando?",
+            'suggestions': _PRICE_SUGGESTIONS
         }
 
-    def _handle_preco_input(self, text: str) -> Dict:
+    def _handle_preco_input(self, text: str) -> Reply:
         """
         Processa a entrada do usuário para faixa de preço.
 
@@ -182,90 +326,53 @@ class ConversationManager:
             text: Texto normalizado contendo possível faixa de preço
 
         Returns:
-            Dict: Resposta apropriada baseada no reconhecimento do preço
+            Reply: Resposta apropriada baseada no reconhecimento do preço
         """
         price_range = MessageHandler.extract_price_range(text)
         
         # Validação da faixa de preço
         if not price_range:
-            return {
-                'message': "Não consegui entender a faixa de preço.Poderia informar novamente? (Ex: 'até 50.000' ou 'entre 30.000 e 60.000')",
-                'suggestions': [
-                    "Até 40.000",
-                    "Entre 40.000 e 60.000",
-                    "Entre 60.000 e 80.000",
-                    "Acima de 80.000"
-                ]
-            }
+            return _PRICE_RETRY_REPLY
             
         # Atualiza filtros e estado
-        self.filters['preco_min'], self.filters['preco_max'] = price_range
+        self.filters.preco_min, self.filters.preco_max = price_range
         self.state = ConversationState.AWAITING_COR
         return {
             'message': "Ótimo! Agora me diga:\nQual cor você prefere para o seu carro?",
-            'suggestions': CORES[:5]  # Top 5 cores como sugestão
-        }
-
-    def _handle_cor_input(self, text: str) -> Dict:
-        """
-        Processa a entrada do usuário para cor do veículo.
-
-        Args:
-            text: Texto normalizado contendo possível cor
-
-        Returns:
-            Dict: Resposta apropriada baseada no reconhecimento da cor
-        """
-        cor = MessageHandler.extract_color(text, self.repo)
-        
-        # Validação da cor
-        if not cor:
-            return {
-                'message': "Não consegui identificar a cor. Poderia informar qual cor você prefere?",
-                'suggestions': CORES[:5]
-            }
-            
-        # Atualiza filtros e estado
-        self.filters['cor'] = cor
-        self.state = ConversationState.AWAITING_COMBUSTIVEL
-        return {
-            'message': f"Boa escolha! {cor} é uma ótima cor. Qual tipo de combustível você prefere?",
-            'suggestions': COMBUSTIVEIS[:3]  # Top 3 combustíveis como sugestão
+            'suggestions': _COR_SUGGESTIONS
         }
 
-    def _handle_combustivel_input(self, text: str) -> Dict:
+    def _handle_stage(self, stage: _Stage, text: str) -> Reply:
         """
-        Processa a entrada do usuário para tipo de combustível.
+        Processa a entrada do usuário para uma etapa de simples reconhecimento de termo.
 
         Args:
-            text: Texto normalizado contendo possível combustível
+            stage: Definição da etapa (ver _STAGES)
+            text: Texto normalizado contendo possível valor
 
         Returns:
-            Dict: Resposta apropriada baseada no reconhecimento do combustível
+            Reply: Confirmação com sugestões da próxima etapa ou resposta de nova tentativa
         """
-        combustivel = MessageHandler.extract_fuel(text, self.repo)
+        value = stage.extract(text, self.repo)
         
-        # Validação do combustível
-        if not combustivel:
-            return {
-                'message': "Não consegui identificar o combustível. Poderia informar qual tipo você prefere?",
-                'suggestions': COMBUSTIVEIS[:3]
-            }
+        # Validação do valor
+        if not value:
+            return stage.retry_reply
             
         # Atualiza filtros e estado
-        self.filters['combustivel'] = combustivel
-        self.state = ConversationState.AWAITING_TRANSMISSAO
+        setattr(self.filters, stage.field, value)
+        self.state = stage.next_state
         return {
-            'message': "Entendido! Só mais uma informação: Qual tipo de transmissão você deseja?",
-            'suggestions': TRANSMISSOES  # Todas as opções de transmissão
+            'message': stage.success_message.format(value),
+            'suggestions': stage.suggestions
         }
     
     def do_reset(self):
         """Reseta a conversação para o estado inicial."""
         self.state = ConversationState.INIT
-        self.filters = {}
+        self.filters = Filters()
 
-    def _handle_transmissao_input(self, text: str) -> Dict:
+    def _handle_transmissao_input(self, text: str) -> Reply:
         """
         Processa a entrada do usuário para tipo de transmissão e retorna os resultados.
 
@@ -273,19 +380,16 @@ class ConversationManager:
             text: Texto normalizado contendo possível transmissão
 
         Returns:
-            Dict: Resultados da busca ou mensagem de erro
+            Reply: Resultados da busca ou mensagem de erro
         """
         transmissao = MessageHandler.extract_transmission(text, self.repo)
         
         # Validação da transmissão
         if not transmissao:
-            return {
-                'message': "Não consegui identificar a transmissão. Poderia informar qual tipo você prefere?",
-                'suggestions': TRANSMISSOES
-            }
+            return _TRANS_RETRY_REPLY
             
         # Realiza a busca com todos os filtros
-        self.filters['transmissao'] = transmissao
+        self.filters.transmissao = transmissao
         results = self.repo.search_cars(self.filters)
         self._reset_conversation()
         
@@ -313,4 +417,4 @@ class ConversationManager:
             self.state = ConversationState.AWAITING_BRAND  # Permite nova busca mantendo contexto
         else:
             self.state = ConversationState.INIT  # Reset completo
-        self.filters = {}  # Limpa todos os filtros
\ No newline at end of file
+        self.filters = Filters()  # Limpa todos os filtros
\ No newline at end of file
@@ -1,12 +1,32 @@
-import pandas as pd
-import random
-from sqlalchemy import create_engine, text
-from sqlalchemy.orm import sessionmaker
+import csv
+import io
+import numpy as np
+from sqlalchemy import create_engine, inspect, text
+from functools import lru_cache
+from typing import Dict, List, Optional
+from uuid import uuid4
 from faker import Faker
 from faker_vehicle import VehicleProvider
 from .models import Car, Base, DATABASE_URL
 from shared.constants import TRANSMISSOES, COMBUSTIVEIS, CORES
 
+# Quantidade de veículos distintos pedidos ao Faker ao popular o banco
+VEHICLE_POOL_SIZE = 64
+
+
+@lru_cache(maxsize=1)
+def _get_faker() -> Faker:
+    """
+    Retorna a instância de Faker usada para gerar veículos, criada uma única vez.
+
+    Returns:
+        Faker: Faker em português com o provedor de dados de veículos
+    """
+    fake = Faker('pt_BR')  # Configura Faker para dados em português
+    fake.add_provider(VehicleProvider)  # Adiciona provedor de dados de veículos
+    return fake
+
+
 class DatabaseManager:
     """
     Gerenciador de banco de dados para a aplicação de veículos.
@@ -29,102 +49,129 @@ class DatabaseManager:
         Fluxo:
         1. Cria engine de conexão com o banco
         2. Cria todas as tabelas definidas nos modelos
-        3. Verifica se a tabela 'cars' está vazia
-        4. Se vazia, popula com dados fictícios
+        3. Verifica se a tabela 'cars' existe e tem ao menos um registro
+        4. Se não existir ou estiver vazia, popula com dados fictícios
 
-        Tratamento de erros:
-        - Se a tabela não existir ainda, trata o erro e força a população
+        Observação:
+        - Busca uma única linha em vez de COUNT(*), que varre a tabela inteira em alguns bancos
         """
         engine = create_engine(DATABASE_URL)
         Base.metadata.create_all(bind=engine)  # Cria todas as tabelas definidas nos modelos
         
         with engine.connect() as conn:
-            try:
-                # Verifica se já existem registros na tabela
-                result = conn.execute(text("SELECT COUNT(*) FROM cars"))
-                if result.scalar() == 0:  # Se tabela vazia
-                    DatabaseManager.populate_database(engine)
-            except Exception as e:
-                print(f"Tabela ainda não existe ou erro ao verificar: {e}")
-                # Força população se houver erro na verificação
-                DatabaseManager.populate_database(engine)
+            empty = (
+                not inspect(conn).has_table(Car.__tablename__)
+                or conn.execute(text(f"SELECT 1 FROM {Car.__tablename__} LIMIT 1")).first() is None
+            )
+        if empty:
+            DatabaseManager.populate_database(engine)
 
     @staticmethod
-    def populate_database(engine):
+    def populate_database(engine, seed: Optional[int] = None):
         """
         Popula o banco de dados com veículos fictícios.
 
         Args:
             engine: SQLAlchemy engine configurado para conexão com o banco
+            seed: Semente opcional para gerar sempre os mesmos dados
 
         Processo:
         1. Configura Faker com provedor de dados de veículos
-        2. Gera 200 registros aleatórios
-        3. Faz insert em lote
+        2. Gera 200 registros aleatórios em bloco
+        3. Faz insert em lote (COPY no PostgreSQL; SQLAlchemy Core nos demais bancos)
 
         Tratamento de erros:
-        - Rollback em caso de falha
-        - Fechamento garantido da sessão
+        - Rollback automático da transação em caso de falha
         """
-        fake = Faker('pt_BR')  # Configura Faker para dados em português
-        fake.add_provider(VehicleProvider)  # Adiciona provedor de dados de veículos
-        
-        SessionLocal = sessionmaker(bind=engine)
-        db = SessionLocal()  # Cria sessão para operações no banco
+        fake = _get_faker()
 
         try:
             # Gera 200 carros fictícios
-            carros = [DatabaseManager.generate_car(fake) for _ in range(200)]
-            db.add_all(carros)  # Insert em lote
-            db.commit()  # Confirma transação
+            carros = DatabaseManager.generate_cars(fake, 200, seed)
+            if engine.dialect.name == 'postgresql':
+                DatabaseManager.copy_rows(engine, carros)
+            else:
+                # Insert em lote numa única transação (commit ao sair, rollback em caso de erro)
+                with engine.begin() as conn:
+                    conn.execute(Car.__table__.insert(), carros)
             print(f"Banco populado com {len(carros)} carros!")
         except Exception as e:
-            db.rollback()  # Desfaz em caso de erro
             print(f"Erro ao popular banco: {e}")
+
+    @staticmethod
+    def copy_rows(engine, rows: List[Dict]):
+        """
+        Insere linhas na tabela 'cars' via COPY FROM STDIN (somente PostgreSQL).
+
+        Args:
+            engine: SQLAlchemy engine de um banco PostgreSQL
+            rows: Linhas geradas por generate_cars
+
+        Notas:
+            - O COPY ignora defaults definidos no Python, então o id é gerado aqui
+            - Rollback em caso de falha; o erro é propagado ao chamador
+        """
+        columns = ('id', *rows[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in rows:
+            writer.writerow((uuid4(), *row.values()))
+        buffer.seek(0)
+
+        raw = engine.raw_connection()
+        try:
+            with raw.cursor() as cursor:
+                cursor.copy_expert(
+                    f"COPY {Car.__tablename__} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                    buffer
+                )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
         finally:
-            db.close()  # Garante fechamento da sessão
+            raw.close()
 
     @staticmethod
-    def generate_car(fake):
+    def generate_cars(fake, n: int, seed: Optional[int] = None) -> List[Dict]:
         """
-        Gera um objeto Car com dados aleatórios.
+        Gera os dados de n carros aleatórios, no formato de linha da tabela 'cars'.
 
         Args:
             fake: Instância do Faker configurada
+            n: Quantidade de carros
+            seed: Semente opcional do gerador; a mesma semente gera os mesmos carros
 
         Returns:
-            Car: Objeto Car com atributos aleatórios
+            List[Dict]: Valores das colunas de Car (o id é gerado pelo default da coluna)
 
         Dados gerados:
-        - Marca, modelo, ano e categoria do Faker Vehicle
-        - Demais atributos com valores aleatórios dentro de faixas realistas
+        - Marca, modelo, ano e categoria sorteados de um pool de veículos do Faker Vehicle
+        - Demais atributos sorteados em bloco pelo NumPy, dentro de faixas realistas
         """
-        # Gera atributos com distribuição aleatória
-        portas = random.choice((2, 4))
-        transmissao = random.choice(TRANSMISSOES)
-        km = random.randint(0, 500000)  # Quilometragem entre 0 e 500.000 km
-        combustivel = random.choice(COMBUSTIVEIS)
-        motor = round(random.uniform(1.0, 6.0), 1)  # Motor entre 1.0 e 6.0
-        cidade = round(random.uniform(5.0, 15.0), 2)  # Consumo urbano
-        estrada = round(random.uniform(8.0, 20.0), 2)  # Consumo rodoviário
-        preco = round(random.uniform(20000, 150000), 2)  # Preço entre 20k e 150k
-        cor = random.choice(CORES)
-
-        # Obtém dados básicos do veículo do Faker
-        vehicle_object = fake.vehicle_object()
-
-        return Car(
-            marca=vehicle_object.get('Make'),
-            modelo=vehicle_object.get('Model'),
-            ano=vehicle_object.get('Year'),
-            categoria=vehicle_object.get('Category'),
-            combustivel=combustivel,
-            quilometragem=km,
-            transmissao=transmissao,
-            qtt_portas=portas,
-            motor=motor,
-            consumo_cidade=cidade,
-            consumo_estrada=estrada,
-            preco=preco,
-            cor=cor
-        )
\ No newline at end of file
+        # Um único gerador; o Faker é semeado a partir dele
+        rng = np.random.default_rng(seed)
+        fake.seed_instance(int(rng.integers(2**32)))
+
+        # Obtém dados básicos dos veículos do Faker uma única vez e sorteia entre eles
+        pool = [fake.vehicle_object() for _ in range(min(n, VEHICLE_POOL_SIZE))]
+        vehicles = [pool[i] for i in rng.integers(0, len(pool), n).tolist()]
+
+        # Uma coluna por vez; tolist() converte para tipos nativos aceitos pelo driver
+        columns = {
+            'marca': [vehicle.get('Make') for vehicle in vehicles],
+            'modelo': [vehicle.get('Model') for vehicle in vehicles],
+            'ano': [vehicle.get('Year') for vehicle in vehicles],
+            'categoria': [vehicle.get('Category') for vehicle in vehicles],
+            'combustivel': rng.choice(COMBUSTIVEIS, n).tolist(),
+            'quilometragem': rng.integers(0, 500000, n, endpoint=True).tolist(),  # Entre 0 e 500.000 km
+            'transmissao': rng.choice(TRANSMISSOES, n).tolist(),
+            'qtt_portas': rng.choice((2, 4), n).tolist(),
+            'motor': rng.uniform(1.0, 6.0, n).round(1).tolist(),  # Motor entre 1.0 e 6.0
+            'consumo_cidade': rng.uniform(5.0, 15.0, n).round(2).tolist(),  # Consumo urbano
+            'consumo_estrada': rng.uniform(8.0, 20.0, n).round(2).tolist(),  # Consumo rodoviário
+            'preco': rng.uniform(20000, 150000, n).round(2).tolist(),  # Preço entre 20k e 150k
+            'cor': rng.choice(CORES, n).tolist(),
+        }
+        names = tuple(columns)
+        return [dict(zip(names, row)) for row in zip(*columns.values())]
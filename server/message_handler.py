@@ -1,7 +1,27 @@
 import re
+from functools import lru_cache
 from unidecode import unidecode
-from .repository import CarRepository
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .repository import CarRepository
+
+# Padrões de faixa de preço fundidos em uma única alternação, compilada no carregamento do módulo.
+# Palavras-chave ancoradas em \b e alternativas mais longas primeiro em grupos atômicos (?>...);
+# números e espaços possessivos (*+, ++), pois o que vem depois deles nunca é dígito/espaço.
+_PRICE_RE = re.compile(
+    # Intervalos (entre X e Y)
+    r'\b(?>entre|de)\s*+(?:R\$\s*+)?(?P<lo>\d++[.,]?+\d*+)\s*+(?>até|a|e)\s*+(?:R\$\s*+)?(?P<hi>\d++[.,]?+\d*+)'
+    # Valores máximos (até X)
+    r'|\b(?>até|máximo)\s*+(?:R\$\s*+)?(?P<upto>\d++[.,]?+\d*+)'
+    # Valores mínimos (acima de X)
+    r'|\b(?>acima de|mínimo)\s*+(?:R\$\s*+)?(?P<above>\d++[.,]?+\d*+)'
+    # Valores em milhares (X mil)
+    r'|(?:R\$\s*+)?(?P<mil>\d++[.,]?+\d*+\s*+(?>mil|k))',
+    re.IGNORECASE
+)
+# Remove tudo que não for dígito ou separador decimal
+_NUM_CLEAN = re.compile(r'[^\d.,]')
 
 class MessageHandler:
     """
@@ -18,6 +38,7 @@ class MessageHandler:
     """
 
     @staticmethod
+    @lru_cache(maxsize=4096)
     def normalize_text(text: str) -> str:
         """
         Normaliza o texto para facilitar comparações e buscas.
@@ -32,11 +53,17 @@ class MessageHandler:
             1. Remove espaços no início/fim
             2. Converte para minúsculas
             3. Remove acentos e caracteres especiais
+
+        Observação:
+            - Resultados são memoizados: o mesmo texto é normalizado pelo
+              ConversationManager e novamente por cada extrator
+            - Texto já em ASCII dispensa a transliteração do unidecode
         """
-        return unidecode(text.lower().strip())
+        text = text.lower().strip()
+        return text if text.isascii() else unidecode(text)
 
     @staticmethod
-    def extract_brand(text: str, repo: CarRepository) -> Optional[str]:
+    def extract_brand(text: str, repo: 'CarRepository') -> Optional[str]:
         """
         Extrai a marca do veículo de um texto, comparando com marcas conhecidas.
 
@@ -50,18 +77,12 @@ class MessageHandler:
         Comportamento:
             - Faz busca case-insensitive
             - Retorna a primeira ocorrência encontrada
-            - Usa a lista de marcas do repositório
+            - Usa o autômato de marcas pré-compilado pelo repositório
         """
-        known_brands = repo.get_unique_brands()
-        normalized_text = MessageHandler.normalize_text(text)
-        
-        for brand in known_brands:
-            if brand.lower() in normalized_text:
-                return brand
-        return None
+        return repo.find_term('marca', MessageHandler.normalize_text(text))
 
     @staticmethod
-    def extract_model(text: str, brand: str, repo: CarRepository) -> Optional[str]:
+    def extract_model(text: str, brand: str, repo: 'CarRepository') -> Optional[str]:
         """
         Extrai o modelo do veículo de um texto, considerando uma marca específica.
 
@@ -76,17 +97,12 @@ class MessageHandler:
         Observação:
             - Só busca modelos se a marca for fornecida
             - Faz busca case-insensitive
+            - Usa o autômato de modelos da marca pré-compilado pelo repositório
         """
         if not brand:
             return None
         
-        known_models = repo.get_models_for_brand(brand)
-        normalized_text = MessageHandler.normalize_text(text)
-        
-        for model in known_models:
-            if model.lower() in normalized_text:
-                return model
-        return None
+        return repo.find_model(MessageHandler.normalize_text(text), brand)
 
     @staticmethod
     def extract_price_range(text: str) -> Optional[Tuple[float, float]]:
@@ -110,43 +126,33 @@ class MessageHandler:
             - Remove pontos de separadores de milhar
             - Converte valores como "10 mil" para 10000
         """
-        patterns = [
-            # Padrão para intervalos (entre X e Y)
-            r'(?:entre|de)\s*(?:R\$\s*)?(\d+[.,]?\d*)\s*(?:a|até|e)\s*(?:R\$\s*)?(\d+[.,]?\d*)',
-            # Padrão para valores máximos (até X)
-            r'(?:até|máximo)\s*(?:R\$\s*)?(\d+[.,]?\d*)',
-            # Padrão para valores mínimos (acima de X)
-            r'(?:acima de|mínimo)\s*(?:R\$\s*)?(\d+[.,]?\d*)',
-            # Padrão para valores em milhares (X mil)
-            r'(?:R\$\s*)?(\d+[.,]?\d*\s*(?:mil|k))'
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
-            if match:
-                try:
-                    if len(match.groups()) == 2:  # Caso de intervalo
-                        min_val = float(match.group(1).replace('.', '').replace(',', '.'))
-                        max_val = float(match.group(2).replace('.', '').replace(',', '.'))
-                        return (min_val, max_val)
-                    else:  # Caso de valor único
-                        value_str = match.group(1).lower()
-                        if 'mil' in value_str or 'k' in value_str:
-                            value = float(re.sub(r'[^\d.,]', '', value_str).replace(',', '.')) * 1000
-                        else:
-                            value = float(re.sub(r'[^\d.,]', '', value_str).replace(',', '.'))
-                        
-                        # Determina se é limite superior ou inferior
-                        if 'até' in text or 'máximo' in text:
-                            return (0.0, value)
-                        else:
-                            return (value, float('inf'))
-                except ValueError:
-                    continue
+        # Uma única varredura; o grupo nomeado preenchido indica o padrão reconhecido
+        for match in _PRICE_RE.finditer(text):
+            try:
+                if match['lo'] is not None:  # Caso de intervalo
+                    min_val = float(match['lo'].replace('.', '').replace(',', '.'))
+                    max_val = float(match['hi'].replace('.', '').replace(',', '.'))
+                    return (min_val, max_val)
+                
+                value_str = (match['upto'] or match['above'] or match['mil']).lower()
+                value = float(_NUM_CLEAN.sub('', value_str).replace(',', '.'))
+                if match['mil'] is not None:  # "X mil" / "Xk"
+                    value *= 1000
+                
+                # Determina se é limite superior ou inferior
+                if match['upto'] is not None:
+                    return (0.0, value)
+                if match['above'] is not None:
+                    return (value, float('inf'))
+                if 'até' in text or 'máximo' in text:
+                    return (0.0, value)
+                return (value, float('inf'))
+            except ValueError:
+                continue
         return None
 
     @staticmethod
-    def extract_color(text: str, repo: CarRepository) -> Optional[str]:
+    def extract_color(text: str, repo: 'CarRepository') -> Optional[str]:
         """
         Extrai a cor do veículo de um texto.
 
@@ -157,16 +163,10 @@ class MessageHandler:
         Returns:
             Optional[str]: Cor encontrada ou None
         """
-        known_colors = repo.data['cor'].dropna().unique().tolist()
-        normalized_text = MessageHandler.normalize_text(text)
-        
-        for color in known_colors:
-            if color.lower() in normalized_text:
-                return color
-        return None
+        return repo.find_term('cor', MessageHandler.normalize_text(text))
 
     @staticmethod
-    def extract_fuel(text: str, repo: CarRepository) -> Optional[str]:
+    def extract_fuel(text: str, repo: 'CarRepository') -> Optional[str]:
         """
         Extrai o tipo de combustível de um texto.
 
@@ -177,17 +177,10 @@ class MessageHandler:
         Returns:
             Optional[str]: Combustível encontrado ou None
         """
-        known_fuels = repo.data['combustivel'].dropna().unique().tolist()
-        normalized_text = MessageHandler.normalize_text(text)
-        
-        for fuel in known_fuels:
-            norm_fuel = MessageHandler.normalize_text(fuel.lower())
-            if norm_fuel in normalized_text:
-                return fuel
-        return None
+        return repo.find_term('combustivel', MessageHandler.normalize_text(text))
 
     @staticmethod
-    def extract_transmission(text: str, repo: CarRepository) -> Optional[str]:
+    def extract_transmission(text: str, repo: 'CarRepository') -> Optional[str]:
         """
         Extrai o tipo de transmissão de um texto.
 
@@ -198,11 +191,4 @@ class MessageHandler:
         Returns:
             Optional[str]: Transmissão encontrada ou None
         """
-        known_transmissions = repo.data['transmissao'].dropna().unique().tolist()
-        normalized_text = MessageHandler.normalize_text(text)
-        
-        for trans in known_transmissions:
-            norm_trans = MessageHandler.normalize_text(trans)
-            if norm_trans in normalized_text:
-                return trans
-        return None
\ No newline at end of file
+        return repo.find_term('transmissao', MessageHandler.normalize_text(text))
\ No newline at end of file
@@ -1,7 +1,42 @@
 import pandas as pd
-from sqlalchemy import create_engine
-from typing import List, Dict
-from .models import DATABASE_URL
+import ahocorasick
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from sqlalchemy import String, cast, create_engine, select
+from typing import Iterable, List, Dict, Optional, Set, Tuple
+from .models import Car, DATABASE_URL
+from .message_handler import MessageHandler
+
+# Colunas categóricas com índice invertido (valor em minúsculas -> posições das linhas)
+INDEXED_COLUMNS = ('marca', 'modelo', 'cor', 'combustivel', 'transmissao')
+
+# Colunas de baixa cardinalidade, guardadas como category (códigos inteiros + vocabulário)
+CATEGORICAL_COLUMNS = ('marca', 'cor', 'combustivel', 'transmissao', 'categoria')
+
+# Leitura da tabela 'cars': linhas por bloco e tipos das colunas inteiras (ver _load_data)
+LOAD_CHUNKSIZE = 50_000
+LOAD_DTYPES = {'ano': 'int32', 'quilometragem': 'int32', 'qtt_portas': 'int32'}
+
+# Colunas cujo vocabulário é reconhecido em mensagens via Aho-Corasick (modelos ficam por marca)
+MATCHED_COLUMNS = ('marca', 'cor', 'combustivel', 'transmissao')
+
+
+@dataclass(slots=True)
+class Filters:
+    """
+    Critérios de busca acumulados ao longo da conversa.
+
+    Campos com valor None não são aplicados na busca.
+    """
+    marca: Optional[str] = None
+    modelo: Optional[str] = None
+    preco_min: Optional[float] = None
+    preco_max: Optional[float] = None
+    cor: Optional[str] = None
+    combustivel: Optional[str] = None
+    transmissao: Optional[str] = None
+
 
 class CarRepository:
     """
@@ -16,6 +51,17 @@ class CarRepository:
     Atributos:
         engine (sqlalchemy.engine.Engine): Conexão com o banco de dados
         data (pd.DataFrame): DataFrame contendo todos os dados de carros
+        _unique_cache (Dict[str, Tuple[str, ...]]): Valores distintos por coluna, calculados sob demanda
+        _indexes (Dict[str, Dict[str, Set[int]]]): Índices invertidos por coluna categórica
+        _models_by_brand (Dict[str, Tuple[str, ...]]): Modelos distintos de cada marca
+        _unique_brands (Tuple[str, ...]): Marcas ordenadas alfabeticamente
+        _brand_models_cache (Dict[str, Tuple[str, ...]]): Resultados memoizados de get_models_for_brand
+        _preco_sorted (List[float]): Preços em ordem crescente, para busca por faixa
+        _preco_order (List[int]): Posição no DataFrame de cada item de _preco_sorted
+        _matchers (Dict[str, ahocorasick.Automaton]): Autômato do vocabulário de cada coluna
+        _model_matchers (Dict[str, ahocorasick.Automaton]): Autômato de modelos por marca
+        _brand_prefixes (List[Tuple[str, str]]): Marcas (normalizada, original) ordenadas, para sugestões
+        _model_prefixes (Dict[str, List[Tuple[str, str]]]): Modelos ordenados por marca, para sugestões
     """
 
     def __init__(self):
@@ -24,8 +70,26 @@ class CarRepository:
         """
         # Cria engine de conexão com o banco de dados
         self.engine = create_engine(DATABASE_URL)
+        self._unique_cache: Dict[str, Tuple[str, ...]] = {}
+        self.reload()
+
+    def reload(self):
+        """
+        (Re)carrega os dados do banco e reconstrói todas as estruturas derivadas deles.
+
+        Notas:
+            - Deve ser chamado sempre que a tabela 'cars' for alterada
+        """
         # Carrega os dados na memória como DataFrame
         self.data = self._load_data()
+        # Valores distintos calculados a partir dos dados antigos deixam de valer
+        self._invalidate_unique_cache()
+        # Índices para que search_cars não precise varrer o DataFrame inteiro
+        self._build_indexes()
+        # Autômatos para extração de termos das mensagens
+        self._build_matchers()
+        # Vocabulários ordenados para sugestões por prefixo
+        self._build_prefix_indexes()
 
     def _load_data(self) -> pd.DataFrame:
         """
@@ -35,14 +99,262 @@ class CarRepository:
             pd.DataFrame: DataFrame contendo todos os registros da tabela 'cars'
         
         Notas:
-            - Converte a coluna 'id' para string se existir
+            - A coluna 'id' já chega como texto (conversão feita pelo banco)
+            - Leitura em blocos com tipos numéricos explícitos (LOAD_DTYPES)
+            - Colunas de CATEGORICAL_COLUMNS viram category, reduzindo memória e custo de unique()
             - Todos os dados são carregados na memória para otimizar consultas
         """
-        df = pd.read_sql_table('cars', self.engine)
-        if 'id' in df.columns:
-            df['id'] = df['id'].astype(str)  # Garante que IDs sejam tratados como strings
+        table = Car.__table__
+        query = select(
+            cast(table.c.id, String).label('id'),  # Garante que IDs sejam tratados como strings
+            *(column for column in table.c if column.name != 'id')
+        )
+        chunks = pd.read_sql_query(query, self.engine, chunksize=LOAD_CHUNKSIZE, dtype=LOAD_DTYPES)
+        df = pd.concat(chunks, ignore_index=True)
+        # Depois do concat: blocos com vocabulários diferentes não se combinam como category
+        for column in CATEGORICAL_COLUMNS:
+            df[column] = df[column].astype('category')
         return df
 
+    def _invalidate_unique_cache(self):
+        """Descarta os valores distintos memoizados por get_unique."""
+        self._unique_cache.clear()
+
+    def get_unique(self, column: str) -> Tuple[str, ...]:
+        """
+        Retorna os valores distintos (não nulos) de uma coluna, na ordem de aparição.
+
+        Args:
+            column: Nome da coluna
+
+        Returns:
+            Tuple[str, ...]: Valores distintos da coluna
+
+        Notas:
+            - O DataFrame é percorrido apenas na primeira chamada por coluna
+        """
+        values = self._unique_cache.get(column)
+        if values is None:
+            values = tuple(self.data[column].dropna().unique().tolist())
+            self._unique_cache[column] = values
+        return values
+
+    def _build_indexes(self):
+        """
+        Constrói os índices usados por search_cars a partir de self.data.
+
+        Notas:
+            - Índices invertidos mapeiam cada valor (minúsculo) às posições das linhas
+            - Preços ficam ordenados para que faixas sejam resolvidas com bisect
+            - Modelos agrupados por marca atendem get_models_for_brand, autômatos e sugestões
+        """
+        self._indexes: Dict[str, Dict[str, Set[int]]] = {}
+        for column in INDEXED_COLUMNS:
+            index = defaultdict(set)
+            for position, value in enumerate(self.data[column].tolist()):
+                index[value.lower()].add(position)
+            self._indexes[column] = dict(index)
+
+        self._models_by_brand: Dict[str, Tuple[str, ...]] = {
+            brand: tuple(models.tolist())
+            for brand, models in self.data.groupby('marca', observed=True)['modelo'].unique().items()
+        }
+        self._unique_brands: Tuple[str, ...] = tuple(sorted(self._models_by_brand))
+        self._brand_models_cache: Dict[str, Tuple[str, ...]] = {}
+
+        order = self.data['preco'].to_numpy().argsort(kind='stable')
+        self._preco_order: List[int] = order.tolist()
+        self._preco_sorted: List[float] = self.data['preco'].to_numpy()[order].tolist()
+
+    def _build_matchers(self):
+        """
+        Constrói os autômatos Aho-Corasick usados pelo MessageHandler a partir de self.data.
+
+        Notas:
+            - Um autômato por coluna de MATCHED_COLUMNS
+            - Um autômato de modelos para cada marca
+        """
+        self._matchers: Dict[str, ahocorasick.Automaton] = {
+            column: self._build_matcher(self.get_unique(column))
+            for column in MATCHED_COLUMNS
+        }
+        self._model_matchers: Dict[str, ahocorasick.Automaton] = {
+            brand: self._build_matcher(models) for brand, models in self._models_by_brand.items()
+        }
+
+    def _build_prefix_indexes(self):
+        """
+        Constrói os vocabulários ordenados usados por suggest_brands e suggest_models.
+        """
+        self._brand_prefixes = self._build_prefix_index(self.get_unique('marca'))
+        self._model_prefixes: Dict[str, List[Tuple[str, str]]] = {
+            brand: self._build_prefix_index(models) for brand, models in self._models_by_brand.items()
+        }
+
+    @staticmethod
+    def _build_prefix_index(words: Iterable[str]) -> List[Tuple[str, str]]:
+        """
+        Ordena o vocabulário pela forma normalizada, permitindo busca por prefixo com bisect.
+
+        Args:
+            words: Vocabulário
+
+        Returns:
+            List[Tuple[str, str]]: Pares (termo normalizado, termo original) ordenados
+        """
+        return sorted({MessageHandler.normalize_text(word): word for word in words}.items())
+
+    @staticmethod
+    def _prefix_lookup(index: List[Tuple[str, str]], prefix: str, limit: int) -> List[str]:
+        """
+        Retorna os termos do vocabulário que começam com o prefixo.
+
+        Args:
+            index: Vocabulário construído por _build_prefix_index
+            prefix: Texto normalizado
+            limit: Quantidade máxima de termos
+
+        Returns:
+            List[str]: Termos originais, em ordem alfabética
+        """
+        if not prefix:
+            return []
+        matches: List[str] = []
+        # Termos com o mesmo prefixo ficam contíguos a partir do ponto de inserção
+        for position in range(bisect_left(index, (prefix,)), len(index)):
+            key, original = index[position]
+            if not key.startswith(prefix) or len(matches) == limit:
+                break
+            matches.append(original)
+        return matches
+
+    def suggest_brands(self, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Sugere marcas que começam com o texto digitado.
+
+        Args:
+            prefix: Texto normalizado (ver MessageHandler.normalize_text)
+            limit: Quantidade máxima de sugestões
+
+        Returns:
+            List[str]: Marcas encontradas (vazia se nenhuma)
+        """
+        return self._prefix_lookup(self._brand_prefixes, prefix, limit)
+
+    def suggest_models(self, brand: str, prefix: str, limit: int = 5) -> List[str]:
+        """
+        Sugere modelos da marca que começam com o texto digitado.
+
+        Args:
+            brand: Marca do veículo
+            prefix: Texto normalizado (ver MessageHandler.normalize_text)
+            limit: Quantidade máxima de sugestões
+
+        Returns:
+            List[str]: Modelos encontrados (vazia se nenhum)
+        """
+        index = self._model_prefixes.get(brand)
+        if index is None:
+            # Marca informada parcialmente: usa a mesma busca case-insensitive de get_models_for_brand
+            index = self._build_prefix_index(self.get_models_for_brand(brand))
+            self._model_prefixes[brand] = index
+        return self._prefix_lookup(index, prefix, limit)
+
+    @staticmethod
+    def _build_matcher(words: Iterable[str]) -> ahocorasick.Automaton:
+        """
+        Constrói um autômato Aho-Corasick que mapeia cada termo normalizado a
+        (tamanho do termo normalizado, termo original).
+
+        Args:
+            words: Vocabulário a ser reconhecido
+
+        Returns:
+            ahocorasick.Automaton: Autômato pronto para busca
+        """
+        automaton = ahocorasick.Automaton()
+        for word in words:
+            key = MessageHandler.normalize_text(word)
+            automaton.add_word(key, (len(key), word))
+        automaton.make_automaton()
+        return automaton
+
+    @staticmethod
+    def _first_match(matcher: ahocorasick.Automaton, text: str) -> Optional[str]:
+        """
+        Retorna o termo do autômato que começa mais à esquerda no texto, em uma única passada.
+
+        Entre termos que começam na mesma posição, prevalece o mais longo
+        (ex.: "fiat uno" em vez de "fiat"); termos contidos em outro que começa
+        antes são descartados (ex.: "cla" dentro de "b-class").
+
+        Args:
+            matcher: Autômato construído por _build_matcher
+            text: Texto normalizado
+
+        Returns:
+            Optional[str]: Termo original encontrado ou None
+        """
+        if matcher.kind != ahocorasick.AHOCORASICK:  # Vocabulário vazio
+            return None
+        best_start, best_length, best = len(text), 0, None
+        # iter reporta cada ocorrência pela posição final; o início vem do tamanho do termo
+        for end, (length, original) in matcher.iter(text):
+            start = end - length + 1
+            if start < best_start or (start == best_start and length > best_length):
+                best_start, best_length, best = start, length, original
+        return best
+
+    def find_term(self, column: str, text: str) -> Optional[str]:
+        """
+        Procura no texto um valor conhecido da coluna informada.
+
+        Args:
+            column: Uma das colunas de MATCHED_COLUMNS
+            text: Texto normalizado (ver MessageHandler.normalize_text)
+
+        Returns:
+            Optional[str]: Valor original da coluna ou None se não encontrado
+        """
+        return self._first_match(self._matchers[column], text)
+
+    def find_model(self, text: str, brand: str) -> Optional[str]:
+        """
+        Procura no texto um modelo conhecido da marca informada.
+
+        Args:
+            text: Texto normalizado (ver MessageHandler.normalize_text)
+            brand: Marca do veículo
+
+        Returns:
+            Optional[str]: Nome do modelo ou None se não encontrado
+        """
+        matcher = self._model_matchers.get(brand)
+        if matcher is None:
+            # Marca informada parcialmente: usa a mesma busca case-insensitive de get_models_for_brand
+            matcher = self._build_matcher(self.get_models_for_brand(brand))
+            self._model_matchers[brand] = matcher
+        return self._first_match(matcher, text)
+
+    def _rows_matching(self, column: str, value: str) -> Set[int]:
+        """
+        Retorna as posições das linhas cujo valor da coluna contém o texto (case-insensitive).
+
+        Args:
+            column: Coluna indexada (ver INDEXED_COLUMNS)
+            value: Texto buscado
+
+        Returns:
+            Set[int]: Posições das linhas no DataFrame
+        """
+        needle = value.lower()
+        rows: Set[int] = set()
+        # Varre o vocabulário da coluna, não as linhas
+        for key, positions in self._indexes[column].items():
+            if needle in key:
+                rows |= positions
+        return rows
+
     def brand_exists(self, brand: str) -> bool:
         """
         Verifica se uma marca existe no repositório (busca case-insensitive).
@@ -53,7 +365,8 @@ class CarRepository:
         Returns:
             bool: True se a marca existe, False caso contrário
         """
-        return not self.data[self.data['marca'].str.contains(brand, case=False)].empty
+        needle = brand.lower()
+        return any(needle in value.lower() for value in self.get_unique('marca'))
 
     def model_exists(self, model: str, brand: str) -> bool:
         """
@@ -66,20 +379,19 @@ class CarRepository:
         Returns:
             bool: True se o par marca/modelo existe, False caso contrário
         """
-        brand_filter = self.data['marca'].str.contains(brand, case=False)
-        model_filter = self.data['modelo'].str.contains(model, case=False)
-        return not self.data[brand_filter & model_filter].empty
+        # Alguma linha precisa atender às duas buscas ao mesmo tempo
+        return not self._rows_matching('marca', brand).isdisjoint(self._rows_matching('modelo', model))
 
-    def get_unique_brands(self) -> List[str]:
+    def get_unique_brands(self) -> Tuple[str, ...]:
         """
-        Retorna lista única de todas as marcas disponíveis, ordenadas alfabeticamente.
+        Retorna todas as marcas disponíveis, ordenadas alfabeticamente.
 
         Returns:
-            List[str]: Lista de marcas únicas
+            Tuple[str, ...]: Marcas únicas, calculadas no carregamento dos dados
         """
-        return sorted(self.data['marca'].unique().tolist())
+        return self._unique_brands
 
-    def get_models_for_brand(self, brand: str) -> List[str]:
+    def get_models_for_brand(self, brand: str) -> Tuple[str, ...]:
         """
         Retorna todos os modelos disponíveis para uma determinada marca (case-insensitive).
 
@@ -87,17 +399,29 @@ class CarRepository:
             brand: Nome da marca para filtrar os modelos
 
         Returns:
-            List[str]: Lista de modelos únicos para a marca, ordenados alfabeticamente
+            Tuple[str, ...]: Modelos únicos para a marca, ordenados alfabeticamente
+
+        Notas:
+            - O resultado de cada marca é memoizado até o próximo reload()
         """
-        mask = self.data['marca'].str.contains(brand, case=False)
-        return sorted(self.data[mask]['modelo'].unique().tolist())
+        models = self._brand_models_cache.get(brand)
+        if models is None:
+            needle = brand.lower()
+            found: Set[str] = set()
+            # Varre as marcas conhecidas, não as linhas
+            for known_brand, brand_models in self._models_by_brand.items():
+                if needle in known_brand.lower():
+                    found.update(brand_models)
+            models = tuple(sorted(found))
+            self._brand_models_cache[brand] = models
+        return models
 
-    def search_cars(self, filters: Dict) -> List[Dict]:
+    def search_cars(self, filters: Filters) -> List[Dict]:
         """
         Busca carros com base em múltiplos critérios de filtro.
 
         Args:
-            filters: Dicionário com parâmetros de busca. Possíveis chaves:
+            filters: Critérios de busca. Campos considerados quando não são None:
                 - marca: Nome da marca (busca parcial case-insensitive)
                 - modelo: Nome do modelo (busca parcial case-insensitive)
                 - preco_min: Preço mínimo
@@ -110,22 +434,21 @@ class CarRepository:
             List[Dict]: Lista de dicionários contendo os carros que atendem aos filtros,
                       limitado a 20 resultados, ordenados conforme o DataFrame original
         """
-        query = self.data.copy()  # Cria cópia para não modificar o DataFrame original
+        candidates: Optional[Set[int]] = None
         
-        # Aplica filtros cumulativos
-        if 'marca' in filters:
-            query = query[query['marca'].str.contains(filters['marca'], case=False)]
-        if 'modelo' in filters:
-            query = query[query['modelo'].str.contains(filters['modelo'], case=False)]
-        if 'preco_min' in filters and 'preco_max' in filters:
-            query = query[(query['preco'] >= filters['preco_min']) & 
-                         (query['preco'] <= filters['preco_max'])]
-        if 'cor' in filters:
-            query = query[query['cor'].str.contains(filters['cor'], case=False)]
-        if 'combustivel' in filters:
-            query = query[query['combustivel'].str.contains(filters['combustivel'], case=False)]
-        if 'transmissao' in filters:
-            query = query[query['transmissao'].str.contains(filters['transmissao'], case=False)]
+        # Interseção dos índices de cada filtro ativo
+        for column in INDEXED_COLUMNS:
+            value = getattr(filters, column)
+            if value is not None:
+                rows = self._rows_matching(column, value)
+                candidates = rows if candidates is None else candidates & rows
+        if filters.preco_min is not None and filters.preco_max is not None:
+            start = bisect_left(self._preco_sorted, filters.preco_min)
+            end = bisect_right(self._preco_sorted, filters.preco_max)
+            rows = set(self._preco_order[start:end])
+            candidates = rows if candidates is None else candidates & rows
         
         # Retorna no máximo 20 resultados no formato de dicionários
-        return query.head(20).to_dict('records')
\ No newline at end of file
+        if candidates is None:
+            return self.data.head(20).to_dict('records')
+        return self.data.iloc[sorted(candidates)[:20]].to_dict('records')
@@ -1,9 +1,22 @@
+import asyncio
+import orjson
 import zmq
+import zmq.asyncio
+import os
 import signal
 import sys
+import time
+from collections import OrderedDict
+from typing import Dict
 from .database import DatabaseManager
 from .conversation import ConversationManager
 from .repository import CarRepository
+from shared.constants import IPC_ENABLED, IPC_ENDPOINT, IPC_PATH
+
+# Conversas sem mensagens por mais de SESSION_TTL segundos são descartadas
+SESSION_TTL = 30 * 60
+# Limite de conversas simultâneas; acima dele, as usadas há mais tempo são descartadas
+MAX_SESSIONS = 1024
 
 class Server:
     """
@@ -16,25 +29,42 @@ class Server:
     - Oferece controle seguro de desligamento
 
     Atributos:
-        context (zmq.Context): Contexto ZeroMQ para comunicação
-        socket (zmq.Socket): Socket REP (Reply) para comunicação
+        context (zmq.asyncio.Context): Contexto ZeroMQ assíncrono para comunicação
+        socket (zmq.Socket): Socket ROUTER para comunicação
         shutdown (bool): Flag para controle de desligamento gracioso
         repo (CarRepository): Repositório de dados de carros
-        conversation (ConversationManager): Gerenciador de diálogo
+        sessions (OrderedDict[bytes, ConversationManager]): Gerenciador de diálogo de cada
+            cliente, do menos para o mais recentemente usado
+        _session_locks (Dict[bytes, asyncio.Lock]): Serializa as mensagens de um mesmo cliente
+        _session_seen (Dict[bytes, float]): Instante (time.monotonic) da última mensagem de cada cliente
+        _pending (set): Tasks de requisições em processamento
+        _ipc_bound (bool): Indica se o endpoint IPC (opcional, ZMQ_IPC=1) foi aberto por este servidor
     """
 
     def __init__(self):
         """Inicializa o servidor, configurando socket, banco de dados e handlers."""
         # Configuração do ZeroMQ
-        self.context = zmq.Context()
-        self.socket = self.context.socket(zmq.REP)  # Socket do tipo REP (Reply)
+        self.context = zmq.asyncio.Context()
+        self.socket = self.context.socket(zmq.ROUTER)  # ROUTER: aceita requisições em pipeline
         self.socket.bind("tcp://0.0.0.0:5555")  # Escuta em todas as interfaces
+        self._ipc_bound = False  # Só remove no cleanup o arquivo IPC criado por este servidor
+        if IPC_ENABLED and zmq.has('ipc'):
+            try:
+                self.socket.bind(IPC_ENDPOINT)  # Atalho sem TCP para clientes locais
+                self._ipc_bound = True
+            except zmq.ZMQError as e:
+                print(f"Endpoint IPC indisponível ({IPC_ENDPOINT}), seguindo apenas com TCP: {e}")
         self.shutdown = False  # Flag para controle de desligamento
 
         # Inicialização do banco de dados e dependências
         DatabaseManager.initialize_database()
         self.repo = CarRepository()  # Repositório de dados
-        self.conversation = ConversationManager(self.repo)  # Gerenciador de conversação
+        # Uma conversa por cliente, identificada pela identidade do socket ROUTER
+        self.sessions: OrderedDict[bytes, ConversationManager] = OrderedDict()
+        # Cada conversa é stateful: uma mensagem por vez por cliente, clientes em paralelo
+        self._session_locks: Dict[bytes, asyncio.Lock] = {}
+        self._session_seen: Dict[bytes, float] = {}
+        self._pending = set()  # Mantém referência às tasks em andamento
 
         # Configura handlers para sinais de desligamento
         signal.signal(signal.SIGINT, self.handle_shutdown)  # Captura Ctrl+C
@@ -61,32 +91,125 @@ class Server:
         print(f"Total de carros carregados: {len(self.repo.data)}")
 
         try:
-            while not self.shutdown:
-                try:
-                    # Recebe requisição sem bloquear (permite verificar shutdown)
-                    request = self.socket.recv_json(flags=zmq.NOBLOCK)
-                    
-                    # Processa comando especial de reset
-                    if request.get('action', '') == 'reset':
-                        self.conversation.do_reset()
-                        continue
-                    
-                    # Processa mensagem normal e envia resposta
-                    response = self.conversation.process_message(request.get('message', ''))
-                    self.socket.send_json(response)
-                    
-                except zmq.Again:
-                    # Não há mensagens disponíveis no momento
-                    if self.shutdown:
-                        break  # Sai se estiver desligando
-                    continue  # Continua esperando mensagens
-                    
+            asyncio.run(self._serve())
         except Exception as e:
             print(f'Erro no servidor: {e}')
         finally:
             # Garante liberação adequada de recursos
             self._cleanup_resources()
 
+    async def _serve(self):
+        """
+        Loop assíncrono de recebimento de requisições.
+
+        O event loop cuida apenas do I/O do socket; cada requisição é tratada em
+        uma task própria, para que novas mensagens continuem sendo recebidas
+        enquanto a anterior é processada.
+        """
+        while not self.shutdown:
+            # Aguarda mensagens com timeout (permite verificar shutdown)
+            if not await self.socket.poll(100, zmq.POLLIN):
+                continue
+            try:
+                frames = await self.socket.recv_multipart()
+            except zmq.ZMQError as e:
+                print(f'Erro ao receber requisição: {e}')
+                continue
+            # Envelope esperado do DEALER: [identidade, delimitador vazio, payload]
+            if len(frames) != 3:
+                print(f'Requisição malformada ignorada: {len(frames)} frames')
+                continue
+            identity, _, payload = frames
+            task = asyncio.create_task(self._handle_request(identity, payload))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _handle_request(self, identity: bytes, payload: bytes):
+        """
+        Processa uma requisição e envia a resposta ao cliente de origem.
+
+        Args:
+            identity: Identidade do cliente atribuída pelo socket ROUTER
+            payload: Corpo JSON da requisição
+        """
+        try:
+            request = orjson.loads(payload)
+            
+            # Processa comando especial de reset: a conversa do cliente é descartada
+            if request.get('action', '') == 'reset':
+                self._drop_session(identity)
+                return
+            
+            conversation = self._get_session(identity)
+            
+            async with self._session_locks[identity]:
+                # Processamento CPU-bound fora do event loop, no pool de threads padrão
+                response = await asyncio.to_thread(
+                    conversation.process_message, request.get('message', '')
+                )
+            
+            # Respostas estáticas já chegam serializadas
+            if not isinstance(response, bytes):
+                response = orjson.dumps(response)
+            await self.socket.send_multipart([identity, b"", response])
+        except Exception as e:
+            print(f'Erro ao processar requisição: {e}')
+
+    def _get_session(self, identity: bytes) -> ConversationManager:
+        """
+        Retorna a conversa do cliente, criando-a na primeira mensagem.
+
+        Args:
+            identity: Identidade do cliente atribuída pelo socket ROUTER
+
+        Returns:
+            ConversationManager: Gerenciador de diálogo do cliente
+
+        Observação:
+            - Aproveita a chamada para descartar conversas expiradas ou excedentes
+        """
+        now = time.monotonic()
+        conversation = self.sessions.get(identity)
+        if conversation is None:
+            conversation = ConversationManager(self.repo)
+            self.sessions[identity] = conversation
+            self._session_locks[identity] = asyncio.Lock()
+        else:
+            self.sessions.move_to_end(identity)  # Mais recentemente usada vai para o fim
+        self._session_seen[identity] = now
+        self._evict_sessions(now)
+        return conversation
+
+    def _evict_sessions(self, now: float):
+        """
+        Descarta conversas ociosas há mais de SESSION_TTL ou além de MAX_SESSIONS.
+
+        Args:
+            now: Instante atual (time.monotonic)
+
+        Observação:
+            - Percorre a partir da menos recentemente usada e para na primeira que deve ficar
+            - Conversas com mensagem em processamento (lock ocupado) nunca são descartadas
+        """
+        for identity in list(self.sessions):
+            expired = now - self._session_seen[identity] > SESSION_TTL
+            if not expired and len(self.sessions) <= MAX_SESSIONS:
+                break
+            if self._session_locks[identity].locked():
+                break
+            self._drop_session(identity)
+
+    def _drop_session(self, identity: bytes):
+        """
+        Remove a conversa do cliente, se existir; a próxima mensagem inicia uma nova.
+
+        Args:
+            identity: Identidade do cliente atribuída pelo socket ROUTER
+        """
+        self.sessions.pop(identity, None)
+        self._session_locks.pop(identity, None)
+        self._session_seen.pop(identity, None)
+
     def _cleanup_resources(self):
         """Libera recursos de rede e contexto de forma segura."""
         try:
@@ -99,4 +222,10 @@ class Server:
             if hasattr(self, 'context') and self.context:
                 self.context.term()  # Finaliza contexto ZeroMQ
         except Exception as e:
-            print(f"Erro ao terminar contexto: {e}")
\ No newline at end of file
+            print(f"Erro ao terminar contexto: {e}")
+
+        try:
+            if getattr(self, '_ipc_bound', False) and os.path.exists(IPC_PATH):
+                os.unlink(IPC_PATH)  # Remove o arquivo do socket IPC deixado pelo bind
+        except OSError as e:
+            print(f"Erro ao remover socket IPC: {e}")
\ No newline at end of file
@@ -1,3 +1,11 @@
+import os
+
 CORES = ["Preto", "Branco", "Prata", "Cinza", "Vermelho", "Azul", "Verde", "Amarelo"]
 COMBUSTIVEIS = ["Gasolina", "Álcool", "Diesel", "Flex", "Elétrico", "Híbrido"]
-TRANSMISSOES = ["Manual", "Automático", "CVT"]
\ No newline at end of file
+TRANSMISSOES = ["Manual", "Automático", "CVT"]
+
+# Endpoint IPC (socket UNIX) do servidor, usado por clientes na mesma máquina.
+# Opcional: só é usado com ZMQ_IPC=1 no ambiente do servidor e do cliente; TCP é sempre o padrão
+IPC_ENABLED = os.getenv('ZMQ_IPC', '0').lower() in ('1', 'true')
+IPC_PATH = "/tmp/c2s_challenge.sock"
+IPC_ENDPOINT = f"ipc://{IPC_PATH}"